@@ -2,49 +2,60 @@
 
 import sys
 
+from hecko.commands import candidates
 
-def _parse_cmd(text):
-    """Parse a single input and print the result in test_cases.txt format."""
-    from hecko.commands import ALL_COMMANDS as modules
+# Value formatters for arg types printed specially in test_cases.txt format,
+# keyed by exact type (so bool isn't mistaken for int)
+_FORMATTERS = {
+    bool: lambda val: "true" if val else "false",
+    list: lambda val: "nonempty" if val else "empty",
+    type(None): lambda val: "none",
+}
+
+
+def best_parse(text, modules):
+    """Parse text against modules in order, return the winning Parse or None.
 
+    Stops at the first perfect score: it can't be beaten, and earlier
+    modules win ties.
+    """
     parses = []
     for mod in modules:
         p = mod.parse(text)
         if p is not None:
             p.module = mod
             parses.append(p)
+            if p.score >= 1.0:
+                break
+    if not parses:
+        return None
+    parses.sort(key=lambda p: -p.score)
+    return parses[0]
+
+
+def _parse_cmd(text):
+    """Parse a single input and print the result in test_cases.txt format."""
+    best = best_parse(text, candidates(text))
 
     print(f"> {text}")
 
-    if not parses:
+    if best is None:
         print("module: none")
         return
 
-    parses.sort(key=lambda p: -p.score)
-    best = parses[0]
     mod_name = best.module.__name__.split(".")[-1]
 
     print(f"module: {mod_name}")
     print(f"command: {best.command}")
 
     for key, val in best.args.items():
-        if hasattr(val, "hour"):
+        fmt = _FORMATTERS.get(type(val))
+        if fmt is not None:
+            print(f"{key}: {fmt(val)}")
+        elif hasattr(val, "hour"):
             # datetime-like: print dotted attributes
             print(f"{key}.hour: {val.hour}")
             print(f"{key}.minute: {val.minute}")
-        elif isinstance(val, list):
-            if val:
-                print(f"{key}: nonempty")
-            else:
-                print(f"{key}: empty")
-        elif isinstance(val, bool):
-            print(f"{key}: {'true' if val else 'false'}")
-        elif val is None:
-            print(f"{key}: none")
-        elif isinstance(val, float):
-            print(f"{key}: {val}")
-        elif isinstance(val, int):
-            print(f"{key}: {val}")
         else:
             print(f"{key}: {val}")
 
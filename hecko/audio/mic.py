@@ -51,6 +51,8 @@ def open_mic_stream(callback, device=None, block_size=BLOCK_SIZE):
     Args:
         callback: Called with (audio_data, overflow) for each block.
                   audio_data is a numpy int16 array of shape (block_size,).
+                  It is a view into sounddevice's buffer and is only valid
+                  during the callback: copy it if you need to keep it.
         device: Input device index, or None for default.
         block_size: Samples per block (default 1600 = 100ms at 16kHz).
 
@@ -61,8 +63,9 @@ def open_mic_stream(callback, device=None, block_size=BLOCK_SIZE):
     def _sd_callback(indata, frames, time_info, status):
         if status:
             print(f"[mic] {status}")
-        # indata is (frames, channels) float32 or int16 depending on dtype
-        audio = indata[:, 0].copy()
+        # indata is (frames, channels) float32 or int16 depending on dtype.
+        # Pass a view, not a copy: no allocation on the realtime audio thread.
+        audio = indata[:, 0]
         callback(audio, bool(status.input_overflow if status else False))
 
     if device is None:
@@ -91,26 +94,36 @@ if __name__ == "__main__":
     else:
         print("\nUsing system default input device")
 
-    print(f"Recording 5 seconds at {SAMPLE_RATE} Hz...")
+    record_seconds = 5
+    print(f"Recording {record_seconds} seconds at {SAMPLE_RATE} Hz...")
 
-    chunks = []
+    # Preallocated capture buffer (with a second of slack): each block is
+    # written straight into place, so there's no list of chunks to concatenate.
+    buf = np.empty(SAMPLE_RATE * (record_seconds + 1), dtype=np.int16)
+    write_idx = 0
 
     def on_audio(data, overflow):
-        chunks.append(data)
+        global write_idx
+        n = min(len(data), len(buf) - write_idx)
+        buf[write_idx:write_idx + n] = data[:n]
+        write_idx += n
         if overflow:
             print("[mic] overflow!")
 
     stream, _ = open_mic_stream(on_audio)
     try:
-        time.sleep(5)
+        time.sleep(record_seconds)
     finally:
         stream.stop()
         stream.close()
 
-    audio = np.concatenate(chunks)
+    audio = buf[:write_idx]
     duration = len(audio) / SAMPLE_RATE
-    peak = np.max(np.abs(audio))
-    rms = np.sqrt(np.mean(audio.astype(np.float64) ** 2))
+    # Peak without an abs() copy (Python ints, so -(-32768) can't overflow),
+    # and RMS from einsum accumulating the int16 squares in int64 (buffered
+    # a chunk at a time, not a widened copy of the whole recording)
+    peak = max(int(audio.max()), -int(audio.min()))
+    rms = (int(np.einsum("i,i->", audio, audio, dtype=np.int64)) / len(audio)) ** 0.5
 
     print(f"\nCaptured {duration:.2f}s ({len(audio)} samples)")
     print(f"Peak amplitude: {peak}")
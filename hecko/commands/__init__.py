@@ -1,11 +1,78 @@
-from hecko.commands import (
-    greeting, quit_demo, timer, weather, time_cmd,
-    reminder, grocery, music, math_cmd, sports, repeat, sleep, ask_claude,
-    stock_prices,
-)
-
-ALL_COMMANDS = [
-    greeting, quit_demo, timer, weather, time_cmd,
-    reminder, grocery, music, math_cmd, sports, repeat, sleep, ask_claude,
-    stock_prices,
+import importlib
+
+from hecko.commands.preprocess import preprocess
+
+_COMMAND_NAMES = [
+    "greeting", "quit_demo", "timer", "weather", "time_cmd",
+    "reminder", "grocery", "music", "math_cmd", "sports", "repeat", "sleep", "ask_claude",
+    "stock_prices",
 ]
+
+
+class _LazyModule:
+    """Stand-in for a command module that imports it on first attribute access.
+
+    Keeps heavy dependencies (ourgroceries, spotipy, pint, ...) off the import
+    path until a command module is actually used.
+    """
+
+    def __init__(self, name):
+        # Set directly, so naming a module (router logs, tests) doesn't import it
+        self.__name__ = f"hecko.commands.{name}"
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self.__name__)
+        return getattr(self._module, attr)
+
+    def __repr__(self):
+        return f"<lazy module {self.__name__!r}>"
+
+
+ALL_COMMANDS = [_LazyModule(name) for name in _COMMAND_NAMES]
+
+
+# First-word prefilter. Every utterance these modules can match starts with
+# one of the listed words, so they are only parsed when the text's first word
+# is in their set; modules not listed are always candidates. The table lives
+# here, keyed by module name, so choosing candidates imports only the modules
+# it returns. Keep each set in step with its module's patterns.
+_FIRST_TOKENS = {
+    "ask_claude": frozenset({"ask", "hey", "hi", "claude", "cloud"}),
+    "repeat": frozenset({
+        "say", "repeat", "can", "could", "what", "come", "one", "i", "pardon",
+    }),
+    # Including the "tell our groceries" style prefixes
+    "grocery": frozenset({
+        "add", "and", "put", "hello", "remove", "take", "delete", "do", "is", "are",
+        "how", "what's", "what", "tell", "fill", "ask",
+    }),
+    "sleep": frozenset({
+        "go", "stop", "pause", "suspend", "enter", "privacy", "sleep", "be", "shut",
+        "mute", "wake", "i'm", "resume", "start", "exit", "leave",
+    }),
+}
+
+
+def _build_token_index():
+    """Return (always, by_token), both keeping ALL_COMMANDS order.
+
+    always lists the modules with no first-token set; by_token maps each
+    first token to the modules worth parsing when the text starts with it.
+    """
+    named = list(zip(_COMMAND_NAMES, ALL_COMMANDS))
+    always = [mod for name, mod in named if name not in _FIRST_TOKENS]
+    by_token = {}
+    for tok in set().union(*_FIRST_TOKENS.values()):
+        by_token[tok] = [mod for name, mod in named
+                         if name not in _FIRST_TOKENS or tok in _FIRST_TOKENS[name]]
+    return always, by_token
+
+
+_always, _by_token = _build_token_index()
+
+
+def candidates(text):
+    """Return the command modules worth parsing text with, in ALL_COMMANDS order."""
+    return _by_token.get(preprocess(text).first_word, _always)
@@ -1,7 +1,13 @@
 """Ask Claude — forward a question to the Anthropic API and return the response."""
 
+import threading
+
 from hecko.commands.template import TemplatePattern
 from hecko.commands.parse import Parse
+from hecko.commands.warmup import run_in_background
+
+# Every pattern starts with one of this module's words in
+# commands._FIRST_TOKENS; keep that set in step with them
 
 _PATTERNS = [
     TemplatePattern("ask [Claude|cloud] $message", greedy=True),
@@ -9,21 +15,35 @@ _PATTERNS = [
     TemplatePattern("[Claude|cloud] $message", greedy=True),
 ]
 
+# Commas/periods/colons that Whisper may insert after "Claude"
+_STRIP_PUNCT = str.maketrans("", "", ",.:")
+
 _client = None
+_client_lock = threading.Lock()
 
 
 def _get_client():
     global _client
     if _client is None:
-        from hecko.claude_credentials import ANTHROPIC_API_KEY
-        import anthropic
-        _client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
+        with _client_lock:
+            if _client is None:
+                from hecko.claude_credentials import ANTHROPIC_API_KEY
+                import anthropic
+                _client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
     return _client
 
 
+def warm_up():
+    """Import anthropic and build the client in the background.
+
+    Called at startup so the first "ask Claude" doesn't pay for it.
+    """
+    run_in_background(_get_client, "claude-warmup")
+
+
 def parse(text):
     # Strip commas/periods that Whisper may insert after "Claude"
-    clean = text.replace(",", "").replace(".", "").replace(":", "")
+    clean = text.translate(_STRIP_PUNCT)
     for pat in _PATTERNS:
         m = pat.match(clean)
         if m is not None:
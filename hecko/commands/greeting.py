@@ -1,9 +1,11 @@
 """Greeting command: responds to hello, hi, good morning, thank you, goodbye, etc."""
 
 import re
+import time
 from datetime import datetime
 
 from hecko.commands.parse import Parse
+from hecko.commands.preprocess import preprocess
 
 _GREETINGS = [
     "hello", "hi", "hey", "howdy", "greetings",
@@ -11,15 +13,22 @@ _GREETINGS = [
     "what's up", "whats up",
 ]
 
+# All greetings as one alternation, longest first: fullmatch for an exact
+# greeting, match for a leading one, search for one anywhere in the text.
+_GREETING_RE = re.compile(
+    "|".join(re.escape(g) for g in sorted(_GREETINGS, key=len, reverse=True)))
+_GREETING_EXACT = re.compile(rf"(?:{_GREETING_RE.pattern})(?: alexa)?")
+
+# parse() lowercases its input, so these patterns are lowercase and skip
+# re.IGNORECASE (case-folded matching is slower in the re engine)
 _THANKS = re.compile(
-    r"\b(?:thank\s*you|thanks|thank\s*ya|much\s+appreciated)\b", re.IGNORECASE)
+    r"\b(?:thank\s*you|thanks|thank\s*ya|much\s+appreciated)\b")
 
 _GOODBYE = re.compile(
     r"\b(?:goodbye|good\s*bye|bye\s*bye|bye|see\s+you\s+later|see\s+ya"
     r"|good\s*night|later|take\s+care|have\s+a\s+good\s+(?:one|night|day|evening)"
     r"|until\s+next\s+time|so\s+long|adios|ciao"
-    r"|I'?m\s+done|that'?s?\s+all|that\s+is\s+all|that(?:'?ll|\s+will)\s+be\s+all)\b",
-    re.IGNORECASE)
+    r"|i'?m\s+done|that'?s?\s+all|that\s+is\s+all|that(?:'?ll|\s+will)\s+be\s+all)\b")
 
 _YOURE_WELCOME = [
     "You're welcome!",
@@ -40,9 +49,17 @@ _FAREWELL = [
 _welcome_idx = 0
 _farewell_idx = 0
 
+# Part of day for each hour 0-23
+_TIME_OF_DAY = ("morning",) * 12 + ("afternoon",) * 5 + ("evening",) * 7
+
+# Time-of-day cache: the answer only changes on the hour
+_tod_cache = None
+_tod_cache_ts = 0
+_TOD_CACHE_TTL = 60  # seconds
+
 
 def parse(text):
-    t = text.lower().strip()
+    t = preprocess(text).lower
 
     if _THANKS.search(t):
         return Parse(command="respond_thanks", score=0.9)
@@ -50,27 +67,23 @@ def parse(text):
         return Parse(command="respond_goodbye", score=0.9)
 
     # Greeting scoring
-    for g in _GREETINGS:
-        if t == g or t == g + " alexa":
-            return Parse(command="greet", score=1.0)
-    for g in _GREETINGS:
-        if t.startswith(g):
-            return Parse(command="greet", score=0.8)
-    for g in _GREETINGS:
-        if g in t:
-            return Parse(command="greet", score=0.4)
+    if _GREETING_EXACT.fullmatch(t):
+        return Parse(command="greet", score=1.0)
+    if _GREETING_RE.match(t):
+        return Parse(command="greet", score=0.8)
+    if _GREETING_RE.search(t):
+        return Parse(command="greet", score=0.4)
 
     return None
 
 
 def _time_of_day():
-    hour = datetime.now().hour
-    if hour < 12:
-        return "morning"
-    elif hour < 17:
-        return "afternoon"
-    else:
-        return "evening"
+    global _tod_cache, _tod_cache_ts
+    now = time.monotonic()
+    if _tod_cache is None or (now - _tod_cache_ts) >= _TOD_CACHE_TTL:
+        _tod_cache = _TIME_OF_DAY[datetime.now().hour]
+        _tod_cache_ts = now
+    return _tod_cache
 
 
 def handle(p):
@@ -13,12 +13,19 @@ Also accepts "tell Our Groceries to ..." or "ask Our Groceries ..." prefix.
 """
 
 import asyncio
+import atexit
+import concurrent.futures
 import re
+import threading
 import time
-from ourgroceries import OurGroceries
+from functools import lru_cache
+import aiohttp
+from ourgroceries import (OurGroceries, YOUR_LISTS, COOKIE_KEY_SESSION,
+                          ATTR_COMMAND, ATTR_TEAM_ID)
 from hecko.og_credentials import OG_USERNAME, OG_PASSWORD
 from hecko.commands.parse import Parse
-from hecko.commands.template import TemplatePattern, match_any
+from hecko.commands.preprocess import preprocess
+from hecko.commands.template import TemplatePattern, TemplateSet
 
 # Cached client and list ID
 _og = None
@@ -27,33 +34,121 @@ _list_id = None
 # Items cache: avoid hammering the Our Groceries API on every command
 _items_cache = None   # cached list of items
 _items_cache_ts = 0   # timestamp of last fetch
+_items_index = {}     # lowercased name (star stripped) -> active item
+_items_active_count = 0  # number of items not crossed off
 _ITEMS_CACHE_TTL = 120  # seconds — refetch after 2 minutes
 
 # Star prefix used to mark items as important
 _STAR = "\u2b50 "
 
+# One long-lived event loop, on its own thread, runs every Our Groceries call.
+# This avoids building and tearing down a loop per command, and the cached
+# client always lives on the same loop. Started on first use (see _get_loop),
+# so importing the module doesn't start a thread.
+_loop = None
+_loop_lock = threading.Lock()
+_REQUEST_TIMEOUT = 10  # seconds — give up on a command (and cancel it) after this
+
+
+# Guard the lazy login, list lookup and items fetch, so a command that arrives
+# while warm_up() is still running waits for it instead of repeating it
+_client_lock = asyncio.Lock()
+_list_id_lock = asyncio.Lock()
+_items_lock = asyncio.Lock()
+
+
+def _get_loop():
+    """Get the grocery event loop, starting it and its thread on first call."""
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="grocery-loop",
+                                 daemon=True).start()
+                _loop = loop
+    return _loop
+
+
+def _run(coro):
+    """Run a coroutine on the grocery event loop and wait for its result."""
+    future = asyncio.run_coroutine_threadsafe(coro, _get_loop())
+    try:
+        return future.result(timeout=_REQUEST_TIMEOUT)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        raise RuntimeError("the request timed out")
+
+
+class _KeepAliveOurGroceries(OurGroceries):
+    """OurGroceries client whose API calls share one HTTP session.
+
+    The library opens a new aiohttp session, and so a new TCP+TLS connection,
+    for every call. Sharing one keeps the connection alive between commands.
+    Login still uses the library's own one-off sessions.
+    """
+
+    _http = None
+
+    async def _post(self, command, other_payload=None):
+        """Post a command to the API (same payload as OurGroceries._post)."""
+        if not self._session_key:
+            await self.login()
+        payload = {ATTR_COMMAND: command}
+        if self._team_id:
+            payload[ATTR_TEAM_ID] = self._team_id
+        if other_payload:
+            payload.update(other_payload)
+        if self._http is None:
+            self._http = aiohttp.ClientSession()
+        cookies = {COOKIE_KEY_SESSION: self._session_key}
+        async with self._http.post(YOUR_LISTS, json=payload, cookies=cookies) as resp:
+            return await resp.json()
+
+    async def close(self):
+        if self._http is not None:
+            await self._http.close()
+            self._http = None
+
+
+@atexit.register
+def _close_client():
+    """Close the shared HTTP session on exit, while the loop still runs."""
+    if _og is not None:
+        try:
+            asyncio.run_coroutine_threadsafe(_og.close(), _loop).result(timeout=2)
+        except Exception:
+            pass
+
 
 async def _get_client():
     """Get or create the Our Groceries client."""
     global _og
-    if _og is None:
-        _og = OurGroceries(OG_USERNAME, OG_PASSWORD)
-        await _og.login()
+    if _og is not None:
+        return _og
+    async with _client_lock:
+        if _og is None:
+            og = _KeepAliveOurGroceries(OG_USERNAME, OG_PASSWORD)
+            await og.login()
+            _og = og
     return _og
 
 
 async def _get_list_id():
     """Find and cache the Shopping List ID."""
     global _list_id
-    if _list_id is None:
-        og = await _get_client()
-        result = await og.get_my_lists()
-        for lst in result.get("shoppingLists", []):
-            if lst["name"] == "Shopping List":
-                _list_id = lst["id"]
-                break
+    if _list_id is not None:
+        return _list_id
+    async with _list_id_lock:
         if _list_id is None:
-            raise RuntimeError("No list named 'Shopping List' found in Our Groceries")
+            og = await _get_client()
+            result = await og.get_my_lists()
+            for lst in result.get("shoppingLists", []):
+                if lst["name"] == "Shopping List":
+                    _list_id = lst["id"]
+                    break
+            if _list_id is None:
+                raise RuntimeError("No list named 'Shopping List' found in Our Groceries")
     return _list_id
 
 
@@ -62,51 +157,75 @@ async def _get_items(force=False):
 
     The Our Groceries team asks that we avoid unnecessary API calls.
     We cache the item list and only refetch after _ITEMS_CACHE_TTL seconds
-    or when force=True (after we mutate the list).
+    or when force=True. Our own adds and removes update the cache in place.
     """
-    global _items_cache, _items_cache_ts
-    now = time.time()
-    if not force and _items_cache is not None and (now - _items_cache_ts) < _ITEMS_CACHE_TTL:
+    global _items_cache_ts
+    async with _items_lock:
+        now = time.monotonic()
+        if not force and _items_cache is not None and (now - _items_cache_ts) < _ITEMS_CACHE_TTL:
+            return _items_cache
+
+        og = await _get_client()
+        list_id = await _get_list_id()
+        result = await og.get_list_items(list_id)
+        _set_items(result.get("list", {}).get("items", []))
+        _items_cache_ts = now
         return _items_cache
 
-    og = await _get_client()
-    list_id = await _get_list_id()
-    result = await og.get_list_items(list_id)
-    _items_cache = result.get("list", {}).get("items", [])
-    _items_cache_ts = now
-    return _items_cache
 
+def _set_items(items):
+    """Replace the cached items, rebuilding the index and active count.
 
-def _invalidate_cache():
-    """Invalidate the items cache after a mutation (add/remove)."""
-    global _items_cache
-    _items_cache = None
+    Also used after our own add/remove, so the next command reads the updated
+    list from memory instead of refetching it.
+    """
+    global _items_cache, _items_index, _items_active_count
+    _items_cache = items
+    _items_index = _index_items(items)
+    _items_active_count = sum(1 for i in items if not i.get("crossedOff"))
 
 
-def _find_item(items, name):
-    """Find an item by name (case-insensitive), ignoring crossed-off items.
+def _index_items(items):
+    """Index active items by lowercased name, with the star prefix stripped.
 
-    Matches against both the raw value and the value with the star prefix stripped.
+    The first item wins when two share a name (e.g. "milk" and a starred "milk").
     """
-    name_lower = name.lower()
+    index = {}
     for item in items:
         if item.get("crossedOff"):
             continue
-        val = item["value"]
-        val_lower = val.lower()
-        # Match with or without star prefix
-        if val_lower == name_lower or val_lower == (_STAR + name).lower():
-            return item
-        # Also strip star and compare
-        if val_lower.startswith(_STAR.lower()) and val_lower[len(_STAR):] == name_lower:
-            return item
-    return None
+        index.setdefault(item["value"].lower().removeprefix(_STAR), item)
+    return index
+
+
+def _find_item(name):
+    """Find an item by name (case-insensitive), ignoring crossed-off items.
+
+    Matches with or without the star prefix. Call _get_items() first so the
+    index is current.
+    """
+    return _items_index.get(name.lower())
+
+
+async def _prewarm():
+    """Log in, find the list, and fill the items cache. Errors are ignored;
+    the first real command will retry and report them."""
+    try:
+        await _get_items()
+    except Exception:
+        pass
+
+
+def warm_up():
+    """Start logging in to Our Groceries in the background, so the first
+    grocery command doesn't pay for the login and list fetches."""
+    asyncio.run_coroutine_threadsafe(_prewarm(), _get_loop())
 
 
 async def _add_item(item_name, important=False):
     """Add an item to the shopping list. Returns a response string."""
-    items = await _get_items()
-    existing = _find_item(items, item_name)
+    await _get_items()
+    existing = _find_item(item_name)
     if existing:
         return f"{item_name} is already on the shopping list."
 
@@ -114,29 +233,34 @@ async def _add_item(item_name, important=False):
     list_id = await _get_list_id()
     value = (_STAR + item_name) if important else item_name
     await og.add_item_to_list(list_id, value, auto_category=True)
-    _invalidate_cache()
+    # Cached without an id until the next fetch; _remove_item refetches for it
+    _set_items(_items_cache + [{"value": value, "crossedOff": False}])
     suffix = " and marked it important" if important else ""
     return f"I've added {item_name} to the shopping list{suffix}."
 
 
 async def _remove_item(item_name):
     """Remove an item from the shopping list. Returns a response string."""
-    items = await _get_items()
-    existing = _find_item(items, item_name)
+    await _get_items()
+    existing = _find_item(item_name)
+    if existing and "id" not in existing:
+        # We added it since the last fetch, so we don't know its id yet
+        await _get_items(force=True)
+        existing = _find_item(item_name)
     if not existing:
         return f"I don't see {item_name} on the shopping list."
 
     og = await _get_client()
     list_id = await _get_list_id()
     await og.remove_item_from_list(list_id, existing["id"])
-    _invalidate_cache()
+    _set_items([i for i in _items_cache if i is not existing])
     return f"I've removed {item_name} from the shopping list."
 
 
 async def _check_item(item_name):
     """Check if an item is on the shopping list. Returns a response string."""
-    items = await _get_items()
-    existing = _find_item(items, item_name)
+    await _get_items()
+    existing = _find_item(item_name)
     if existing:
         return f"Yes, {item_name} is on the shopping list."
     return f"No, {item_name} is not on the shopping list."
@@ -144,9 +268,8 @@ async def _check_item(item_name):
 
 async def _count_items():
     """Count non-crossed-off items on the shopping list."""
-    items = await _get_items()
-    active = [i for i in items if not i.get("crossedOff")]
-    n = len(active)
+    await _get_items()
+    n = _items_active_count
     if n == 0:
         return "Your shopping list is empty."
     elif n == 1:
@@ -167,6 +290,9 @@ def _strip_prefix(text):
     Returns (stripped_text, had_prefix).
     """
     t = text.strip()
+    # Cheap check for the prefix's first word before running the regex
+    if not t[:4].lower().startswith(("tell", "fill", "ask")):
+        return t, False
     m = _OG_PREFIX_RE.match(t)
     if m:
         return t[m.end():], True
@@ -177,23 +303,25 @@ def _strip_prefix(text):
 
 _LIST = "[the|my] [shopping|grocery|groceries] list"
 
-# Full patterns (with list name): (TemplatePattern, action)
-_PATTERNS = [
-    (TemplatePattern(f"[add|and|put] $item [to|on] {_LIST}"), "add"),
-    (TemplatePattern(f"Hello Grishory's Dad, $item"), "add"),
-    (TemplatePattern(f"[remove|take|delete] $item [from|off] {_LIST}"), "remove"),
-    (TemplatePattern(f"[do I have|do we have|is|are] $item [on|in] {_LIST}"), "check"),
-    (TemplatePattern(f"how many [items|things] [are |][on|in] {_LIST}"), "count"),
-    (TemplatePattern(f"[what's|what is] on {_LIST}"), "count"),
-]
-
-# Bare patterns for use after "tell our groceries to" prefix (no list name)
-_BARE_PATTERNS = [
-    (TemplatePattern("[add|put|have] $item"), "add"),
-    (TemplatePattern("[remove|take off|delete] $item"), "remove"),
-    (TemplatePattern("[do I have|do we have|is there|check for] $item"), "check"),
-    (TemplatePattern("how many [items|things]"), "count"),
-]
+# Every pattern (and the "tell our groceries" prefix) starts with one of
+# this module's words in commands._FIRST_TOKENS; keep that set in step
+
+# All patterns in one alternation, tagged (action, bare), so each utterance
+# is scanned once. Full patterns (with list name) come first and win; bare
+# patterns (no list name) only count after a "tell our groceries to" prefix.
+_PATTERNS = TemplateSet([
+    (TemplatePattern(f"[add|and|put] $item [to|on] {_LIST}"), ("add", False)),
+    (TemplatePattern(f"Hello Grishory's Dad, $item"), ("add", False)),
+    (TemplatePattern(f"[remove|take|delete] $item [from|off] {_LIST}"), ("remove", False)),
+    (TemplatePattern(f"[do I have|do we have|is|are] $item [on|in] {_LIST}"), ("check", False)),
+    (TemplatePattern(f"how many [items|things] [are |][on|in] {_LIST}"), ("count", False)),
+    (TemplatePattern(f"[what's|what is] on {_LIST}"), ("count", False)),
+    # Bare patterns
+    (TemplatePattern("[add|put|have] $item"), ("add", True)),
+    (TemplatePattern("[remove|take off|delete] $item"), ("remove", True)),
+    (TemplatePattern("[do I have|do we have|is there|check for] $item"), ("check", True)),
+    (TemplatePattern("how many [items|things]"), ("count", True)),
+])
 
 # "and mark it important" suffix detector
 _IMPORTANT_RE = re.compile(
@@ -203,60 +331,74 @@ _IMPORTANT_RE = re.compile(
     re.IGNORECASE)
 
 
+def _find_important(text):
+    """Find an "and mark it important" suffix in text. Returns a match or None."""
+    # Every suffix form contains "and"; most text doesn't, so skip the regex
+    if "and" not in text.lower():
+        return None
+    return _IMPORTANT_RE.search(text)
+
+
+@lru_cache(maxsize=512)
 def _classify(text):
     """Classify the command. Returns (action, item_name, important) or None.
 
     Actions: 'add', 'remove', 'check', 'count'
+    Pure function of text, so results are cached for repeated utterances.
     """
     t, had_prefix = _strip_prefix(text)
 
     # Strip trailing punctuation and "important" suffix before matching
     important = False
     clean = t.rstrip(".?!")
-    imp = _IMPORTANT_RE.search(clean)
+    imp = _find_important(clean)
     if imp:
         important = True
         clean = clean[:imp.start()].strip()
 
-    # Try full patterns (with list name) first, then bare if prefixed
-    pattern_lists = [_PATTERNS]
-    if had_prefix:
-        pattern_lists.append(_BARE_PATTERNS)
+    result = _PATTERNS.match(clean)
+    if result is None:
+        return None
+    (action, bare), fields = result
+    if bare and not had_prefix:
+        return None
+
+    if action == "count":
+        return ("count", None, False)
+
+    item_name = fields["item"]
+    # Also strip "important" suffix from captured item name
+    imp = _find_important(item_name)
+    if imp:
+        important = True
+        item_name = item_name[:imp.start()].strip()
 
-    for patterns in pattern_lists:
-        for tmpl, action in patterns:
-            fields = tmpl.match(clean)
-            if fields is not None:
-                if action == "count":
-                    return ("count", None, False)
+    return (action, item_name, action == "add" and important)
 
-                item_name = fields["item"]
-                # Also strip "important" suffix from captured item name
-                item_cleaned = _IMPORTANT_RE.sub("", item_name).strip()
-                if item_cleaned != item_name:
-                    important = True
-                    item_name = item_cleaned
 
-                return (action, item_name, action == "add" and important)
+_COMMAND_MAP = {
+    "add": "add_item", "remove": "remove_item",
+    "check": "check_item", "count": "count_items",
+}
 
-    return None
+# Every utterance _classify() accepts contains one of these: full patterns
+# name the list, bare ones need the "our groceries" prefix
+_KEYWORDS = ("list", "groceries", "grishory")
 
 
 def parse(text):
-    t, had_prefix = _strip_prefix(text)
+    t = preprocess(text).lower
+    if not any(k in t for k in _KEYWORDS):
+        return None
     result = _classify(text)
     if result is not None:
         action, item_name, important = result
-        command_map = {
-            "add": "add_item", "remove": "remove_item",
-            "check": "check_item", "count": "count_items",
-        }
         args = {}
         if item_name is not None:
             args["item_name"] = item_name
         if action == "add":
             args["important"] = important
-        return Parse(command=command_map[action], score=0.9, args=args)
+        return Parse(command=_COMMAND_MAP[action], score=0.9, args=args)
 
     return None
 
@@ -264,13 +406,13 @@ def parse(text):
 def handle(p):
     try:
         if p.command == "add_item":
-            return asyncio.run(_add_item(p.args["item_name"], p.args.get("important", False)))
+            return _run(_add_item(p.args["item_name"], p.args.get("important", False)))
         elif p.command == "remove_item":
-            return asyncio.run(_remove_item(p.args["item_name"]))
+            return _run(_remove_item(p.args["item_name"]))
         elif p.command == "check_item":
-            return asyncio.run(_check_item(p.args["item_name"]))
+            return _run(_check_item(p.args["item_name"]))
         elif p.command == "count_items":
-            return asyncio.run(_count_items())
+            return _run(_count_items())
     except Exception as e:
         return f"Sorry, I had trouble reaching Our Groceries: {e}"
 
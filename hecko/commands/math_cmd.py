@@ -11,13 +11,45 @@ Handles:
 """
 
 import math
+import operator
 import re
-
-import pint
+import threading
+from functools import lru_cache
 
 from hecko.commands.parse import Parse
+from hecko.commands.preprocess import preprocess
+from hecko.commands.warmup import run_in_background
+
+_ureg = None  # pint UnitRegistry, built on first use (see _get_ureg)
+_ureg_lock = threading.Lock()
+
+
+def _get_ureg():
+    """Get the pint unit registry, importing pint and building it on first call.
+
+    Arithmetic-only queries never pay for it. pint's on-disk cache (under the
+    user cache dir) makes building it several times faster after the first
+    run; fall back if it can't be used.
+    """
+    global _ureg
+    if _ureg is None:
+        with _ureg_lock:
+            if _ureg is None:
+                import pint
+                try:
+                    _ureg = pint.UnitRegistry(cache_folder=":auto:")
+                except Exception:
+                    _ureg = pint.UnitRegistry()
+    return _ureg
+
+
+def warm_up():
+    """Import pint and build the unit registry in the background.
+
+    Called at startup so the first unit conversion doesn't pay for it.
+    """
+    run_in_background(_get_ureg, "pint-warmup")
 
-_ureg = pint.UnitRegistry()
 
 # --- Fractional word numbers ---
 
@@ -43,9 +75,15 @@ _FRACTIONS = {
 }
 
 
+# Every single phrase _parse_number() knows, as floats
+_NUMBER_WORDS = {**{w: float(v) for w, v in _WORD_NUMS.items()}, **_FRACTIONS}
+
+_NUM_AND_FRAC_RE = re.compile(r"(\d+(?:\.\d+)?)\s+and\s+(.+)")
+
+
+@lru_cache(maxsize=1024)
 def _parse_number(s):
-    """Try to parse a number from text. Returns float or None."""
-    s = s.strip().lower().rstrip(".")
+    """Try to parse a number from normalized text. Returns float or None."""
 
     # Direct numeric
     try:
@@ -53,22 +91,18 @@ def _parse_number(s):
     except ValueError:
         pass
 
-    # Fractions like "a quarter", "one half"
-    for phrase, val in _FRACTIONS.items():
-        if s == phrase:
-            return val
+    # Fractions like "a quarter", "one half", and word numbers
+    val = _NUMBER_WORDS.get(s)
+    if val is not None:
+        return val
 
     # "N and a half" etc.
-    m = re.match(r"(\d+(?:\.\d+)?)\s+and\s+(.+)", s)
+    m = _NUM_AND_FRAC_RE.match(s)
     if m:
         frac = _FRACTIONS.get(m.group(2).strip())
         if frac is not None:
             return float(m.group(1)) + frac
 
-    # Word numbers
-    if s in _WORD_NUMS:
-        return float(_WORD_NUMS[s])
-
     return None
 
 
@@ -102,11 +136,30 @@ _UNIT_ALIASES = {
 
 
 def _resolve_unit(s):
-    """Resolve a unit string to a pint-compatible name."""
-    s = s.strip().lower()
+    """Resolve a normalized unit string to a pint-compatible name."""
     return _UNIT_ALIASES.get(s, s)
 
 
+@lru_cache(maxsize=128)
+def _conversion(from_unit, to_unit):
+    """(scale, offset) such that to = from * scale + offset. Raises if pint
+    can't convert. Every unit pair we support is linear, temperatures included."""
+    ureg = _get_ureg()
+    offset = ureg.Quantity(0.0, from_unit).to(to_unit).magnitude
+    scale = ureg.Quantity(1.0, from_unit).to(to_unit).magnitude - offset
+    return scale, offset
+
+
+def _convert(value, from_unit, to_unit):
+    """Convert value between two pint unit names. Raises if incompatible."""
+    scale, offset = _conversion(from_unit, to_unit)
+    if offset:
+        # Rounded, or the offset leaves float noise where the answer is 0
+        # (32 degF -> -3.7e-13 degC)
+        return round(value * scale + offset, 9)
+    return value * scale
+
+
 def _is_temperature(unit_str):
     """Check if a unit is a temperature unit."""
     return unit_str in ("degF", "degC", "kelvin")
@@ -114,16 +167,21 @@ def _is_temperature(unit_str):
 
 # --- Formatting ---
 
+_FMT_FRACTION_LABELS = (
+    ("a half", 0.5), ("a third", 1/3), ("two thirds", 2/3),
+    ("a quarter", 0.25), ("three quarters", 0.75), ("an eighth", 0.125),
+)
+
+
 def _fmt_number(n):
     """Format a number nicely for speech."""
     if n == int(n) and abs(n) < 1e15:
         return f"{int(n):,}"
-    # Check for clean fractions
-    for label, val in [("a half", 0.5), ("a third", 1/3), ("two thirds", 2/3),
-                       ("a quarter", 0.25), ("three quarters", 0.75),
-                       ("an eighth", 0.125)]:
-        if abs(n - val) < 1e-9:
-            return label
+    # Check for clean fractions (all between 0 and 1)
+    if 0 < n < 1:
+        for label, val in _FMT_FRACTION_LABELS:
+            if abs(n - val) < 1e-9:
+                return label
     # Reasonable decimal
     if abs(n) >= 0.01:
         formatted = f"{n:,.4f}".rstrip("0").rstrip(".")
@@ -162,14 +220,15 @@ _UNIT_SPEECH = {
 def _fmt_unit(unit, value):
     """Format a unit name for speech (singular/plural).
 
+    unit is a resolved unit name string (see _resolve_unit), not a pint Unit.
     Uses singular for values <= 1 (e.g., 'a quarter cup', 'a half gallon').
     """
-    name = str(unit)
     plural = value > 1 + 1e-9
-    if name in _UNIT_SPEECH:
-        return _UNIT_SPEECH[name][1 if plural else 0]
+    speech = _UNIT_SPEECH.get(unit)
+    if speech is not None:
+        return speech[1 if plural else 0]
     # Fallback
-    name = name.replace("_", " ")
+    name = unit.replace("_", " ")
     if plural and not name.endswith("s"):
         name += "s"
     return name
@@ -177,75 +236,124 @@ def _fmt_unit(unit, value):
 
 # --- Unit conversion parsing ---
 
-def _split_quantity(text):
+_NUM_UNIT_RE = re.compile(r"([\d,]+(?:\.\d+)?)\s+(.+)")
+
+
+def _build_leading_values():
+    """Map first word -> {second word: value} for the number words and fractions.
+
+    Two-word fractions ("a quarter", "three quarters") are keyed on their
+    second word; the first word's own value (a word number or one-word
+    fraction like "half") is keyed on None.
+    """
+    table = {}
+    for word, val in _WORD_NUMS.items():
+        table.setdefault(word, {})[None] = float(val)
+    for phrase, val in _FRACTIONS.items():
+        first, _, second = phrase.partition(" ")
+        table.setdefault(first, {})[second or None] = val
+    return table
+
+
+_LEADING_VALUES = _build_leading_values()
+_OF_A_RE = re.compile(r"^of\s+(?:a|an)\s+")
+_NUM_AND_FRAC_UNIT_RE = re.compile(r"(\d+(?:\.\d+)?)\s+and\s+(\w+(?:\s+\w+)?)\s+(.+)")
+
+
+def _split_leading_value(t):
+    """Split a leading number word or fraction off t, via _LEADING_VALUES.
+
+    Returns (value, remainder) or (None, None).
+    """
+    first, sep, rest = t.partition(" ")
+    following = _LEADING_VALUES.get(first)
+    if following is None or not sep:
+        return None, None
+
+    # Two-word fraction: "a quarter cup", "three quarters of a cup"
+    second, sep, after = rest.partition(" ")
+    if sep and second in following:
+        remainder = _OF_A_RE.sub("", after.strip())
+        if remainder:
+            return following[second], remainder
+
+    # The first word alone: "one cup", "an ounce", "half of a gallon"
+    remainder = rest.strip()
+    if first in _FRACTIONS:
+        remainder = _OF_A_RE.sub("", remainder)
+    if remainder and None in following:
+        return following[None], remainder
+    return None, None
+
+
+def _split_quantity(t):
     """Split 'a quarter cup' into (0.25, 'cup'). Returns (value, unit_str) or (None, None)."""
-    t = text.strip().lower()
 
     # Try "N unit" where N is numeric
-    m = re.match(r"([\d,]+(?:\.\d+)?)\s+(.+)", t)
+    m = _NUM_UNIT_RE.match(t)
     if m:
         val = _parse_number(m.group(1))
         if val is not None:
             return val, m.group(2).strip()
 
-    # Try fraction words at the start: "a quarter cup", "a quarter of a cup"
-    for phrase, val in sorted(_FRACTIONS.items(), key=lambda x: -len(x[0])):
-        if t.startswith(phrase + " "):
-            remainder = t[len(phrase):].strip()
-            # Strip "of a" / "of an" between fraction and unit
-            remainder = re.sub(r"^of\s+(?:a|an)\s+", "", remainder)
-            if remainder:
-                return val, remainder
+    # Number word or fraction at the start: "a quarter cup", "one cup",
+    # "half of a gallon"
+    val, remainder = _split_leading_value(t)
+    if val is not None:
+        return val, remainder
 
     # Try "N and a half X"
-    m = re.match(r"(\d+(?:\.\d+)?)\s+and\s+(\w+(?:\s+\w+)?)\s+(.+)", t)
+    m = _NUM_AND_FRAC_UNIT_RE.match(t)
     if m:
         whole = _parse_number(m.group(1))
         frac = _FRACTIONS.get(m.group(2).strip())
         if whole is not None and frac is not None:
             return whole + frac, m.group(3).strip()
 
-    # Try word number: "a liter", "one cup", "an ounce"
-    for word, val in _WORD_NUMS.items():
-        if t.startswith(word + " "):
-            remainder = t[len(word):].strip()
-            if remainder:
-                return float(val), remainder
-
     # Bare unit with implied 1: "cup", "liter"
-    resolved = _resolve_unit(t)
-    try:
-        _ureg.parse_expression(f"1 {resolved}")
+    if _is_unit(_resolve_unit(t)):
         return 1.0, t
-    except Exception:
-        pass
 
     return None, None
 
 
-def _parse_unit_conversion(text):
+@lru_cache(maxsize=256)
+def _is_unit(name):
+    """Check whether pint accepts "1 <name>" (so not offset units like degF)."""
+    try:
+        _get_ureg().parse_expression(f"1 {name}")
+        return True
+    except Exception:
+        return False
+
+
+_HOW_MANY_RE = re.compile(r"how\s+many\s+(\w[\w\s]*?)\s+(?:are\s+)?in\s+(.+)")
+_CONVERT_RE = re.compile(r"convert\s+(.+?)\s+to\s+(\w[\w\s]*?)$")
+_WHAT_IS_IN_RE = re.compile(r"what(?:'s|\s+is)\s+(.+?)\s+in\s+(\w[\w\s]*?)$")
+
+
+def _parse_unit_conversion(t):
     """Try to parse a unit conversion query.
 
     Returns (value, from_unit, to_unit) or None.
     """
-    t = text.lower().strip().rstrip("?.")
 
     # Pattern: "how many X in (a/an/N) Y"
-    m = re.search(r"how\s+many\s+(\w[\w\s]*?)\s+(?:are\s+)?in\s+(.+)", t)
+    m = _HOW_MANY_RE.search(t)
     if m:
         target_unit_raw = m.group(1).strip()
         source_raw = m.group(2).strip()
         return _parse_conversion_pair(source_raw, target_unit_raw)
 
     # Pattern: "convert N X to Y"
-    m = re.search(r"convert\s+(.+?)\s+to\s+(\w[\w\s]*?)$", t)
+    m = _CONVERT_RE.search(t)
     if m:
         source_raw = m.group(1).strip()
         target_unit_raw = m.group(2).strip()
         return _parse_conversion_pair(source_raw, target_unit_raw)
 
     # Pattern: "what is N X in Y"
-    m = re.search(r"what(?:'s|\s+is)\s+(.+?)\s+in\s+(\w[\w\s]*?)$", t)
+    m = _WHAT_IS_IN_RE.search(t)
     if m:
         source_raw = m.group(1).strip()
         target_unit_raw = m.group(2).strip()
@@ -266,7 +374,7 @@ def _parse_conversion_pair(source_raw, target_unit_raw):
     source_unit = _resolve_unit(source_unit_raw)
     # Validate units
     try:
-        _ureg.Quantity(source_val, source_unit).to(target_unit)
+        _convert(source_val, source_unit, target_unit)
     except Exception:
         return None
     return (source_val, source_unit, target_unit)
@@ -282,37 +390,54 @@ _MATH_OPS = {
     "to the power of": "**", "raised to": "**",
 }
 
+_OP_FUNCS = {
+    "+": operator.add, "-": operator.sub, "*": operator.mul,
+    "/": operator.truediv, "**": operator.pow,
+}
+
+_NUM = r"[\d,]+(?:\.\d+)?"
+_SQRT_RE = re.compile(rf"(?:the\s+)?square\s+root\s+of\s+({_NUM})")
+_SQUARED_RE = re.compile(rf"({_NUM})\s+squared")
+_CUBED_RE = re.compile(rf"({_NUM})\s+cubed")
+_PCT_SIGN_RE = re.compile(rf"({_NUM})\s*%\s*(?:of\s+)?({_NUM})")
+_PERCENT_RE = re.compile(rf"({_NUM})\s+percent\s+of\s+({_NUM})")
 
-def _parse_math(text):
+# "N op M" patterns, multi-word ops first: (regex, op_word, op_sym)
+_MATH_OP_PATTERNS = [
+    (re.compile(rf"({_NUM})\s+{re.escape(op_word)}\s+({_NUM})"), op_word, op_sym)
+    for op_word, op_sym in sorted(_MATH_OPS.items(), key=lambda x: -len(x[0]))
+]
+
+
+def _parse_math(t):
     """Try to parse a math expression.
 
     Returns (command, args_dict) or None.
     """
-    t = text.lower().strip().rstrip("?.")
 
     # "square root of N"
-    m = re.search(r"(?:the\s+)?square\s+root\s+of\s+([\d,]+(?:\.\d+)?)", t)
+    m = _SQRT_RE.search(t)
     if m:
         n = _parse_number(m.group(1))
         if n is not None:
             return ("sqrt", {"n": n})
 
     # "N squared"
-    m = re.search(r"([\d,]+(?:\.\d+)?)\s+squared", t)
+    m = _SQUARED_RE.search(t)
     if m:
         n = _parse_number(m.group(1))
         if n is not None:
             return ("power", {"n": n, "exp": 2})
 
     # "N cubed"
-    m = re.search(r"([\d,]+(?:\.\d+)?)\s+cubed", t)
+    m = _CUBED_RE.search(t)
     if m:
         n = _parse_number(m.group(1))
         if n is not None:
             return ("power", {"n": n, "exp": 3})
 
     # "N% of M"
-    m = re.search(r"([\d,]+(?:\.\d+)?)\s*%\s*(?:of\s+)?([\d,]+(?:\.\d+)?)", t)
+    m = _PCT_SIGN_RE.search(t)
     if m:
         pct = _parse_number(m.group(1))
         base = _parse_number(m.group(2))
@@ -320,7 +445,7 @@ def _parse_math(text):
             return ("percent", {"pct": pct, "base": base})
 
     # "N percent of M" (Whisper spells it out)
-    m = re.search(r"([\d,]+(?:\.\d+)?)\s+percent\s+of\s+([\d,]+(?:\.\d+)?)", t)
+    m = _PERCENT_RE.search(t)
     if m:
         pct = _parse_number(m.group(1))
         base = _parse_number(m.group(2))
@@ -329,9 +454,8 @@ def _parse_math(text):
 
     # Binary operations: "N op M"
     # Try multi-word ops first, then single-word
-    for op_word, op_sym in sorted(_MATH_OPS.items(), key=lambda x: -len(x[0])):
-        m = re.search(
-            rf"([\d,]+(?:\.\d+)?)\s+{re.escape(op_word)}\s+([\d,]+(?:\.\d+)?)", t)
+    for pattern, op_word, op_sym in _MATH_OP_PATTERNS:
+        m = pattern.search(t)
         if m:
             a = _parse_number(m.group(1))
             b = _parse_number(m.group(2))
@@ -343,123 +467,154 @@ def _parse_math(text):
 
 # --- Command scoring and handling ---
 
-def _classify(text):
+# Classifier: the unit checks take priority over the math checks, so each
+# side is one alternation and the unit side is tried first
+_UNIT_WORDS_RE = "|".join(re.escape(k) for k in sorted(_UNIT_ALIASES, key=len, reverse=True))
+_CLS_UNIT_RE = re.compile(
+    r"\bhow\s+many\s+\w+.*\bin\b"
+    r"|\bconvert\s+.+\s+to\b"
+    # "what is X in Y" where Y is one of our unit names
+    rf"|\bwhat(?:'s|\s+is)\s+.+\s+in\s+(?:{_UNIT_WORDS_RE})\b")
+_CLS_MATH_RE = re.compile(
+    r"\b(?:plus|minus|times|divided by|multiplied by|percent|squared|cubed"
+    r"|square root|to the power)\b"
+    r"|\d+\s*%\s*(?:of\s+)?\d+")
+
+
+def _classify(t):
     """Classify: returns 'unit', 'math', or None."""
-    t = text.lower()
-    if re.search(r"\bhow\s+many\s+\w+.*\bin\b", t):
-        return "unit"
-    if re.search(r"\bconvert\s+.+\s+to\b", t):
-        return "unit"
-    # "what is X in Y" where Y looks like a unit
-    if re.search(r"\bwhat(?:'s|\s+is)\s+.+\s+in\s+(?:fahrenheit|celsius|feet|meters|"
-                 r"inches|cups|tablespoons|teaspoons|ounces|pounds|grams|kilograms|"
-                 r"liters|gallons|quarts|pints|miles|kilometers|centimeters|millimeters"
-                 r"|milliliters|yards)\b", t):
+    if _CLS_UNIT_RE.search(t):
         return "unit"
-    if re.search(r"\b(plus|minus|times|divided by|multiplied by|percent|squared|cubed"
-                 r"|square root|to the power)\b", t):
-        return "math"
-    if re.search(r"\d+\s*%\s*(?:of\s+)?\d+", t):
+    if _CLS_MATH_RE.search(t):
         return "math"
     return None
 
 
 def parse(text):
-    cls = _classify(text)
+    # Normalize once; everything below works on lowercased, stripped text
+    result = _interpret(preprocess(text).lower.rstrip("?."))
+    if result is None:
+        return None
+    command, args = result
+    return Parse(command=command, score=0.9, args=dict(args))
+
+
+@lru_cache(maxsize=512)
+def _interpret(t):
+    """Classify and parse normalized text. Returns (command, args) or None.
+
+    Cached, so repeated utterances skip the regexes and pint; callers must
+    copy args rather than mutate it.
+    """
+    cls = _classify(t)
     if cls is None:
         return None
 
     if cls == "unit":
-        result = _parse_unit_conversion(text)
+        result = _parse_unit_conversion(t)
         if result:
             value, from_unit, to_unit = result
-            return Parse(command="convert_units", score=0.9,
-                         args={"value": value, "from_unit": from_unit, "to_unit": to_unit})
+            return ("convert_units",
+                    {"value": value, "from_unit": from_unit, "to_unit": to_unit})
         # Fall through to try math
-        result = _parse_math(text)
+        result = _parse_math(t)
         if result:
-            command, args = result
-            return Parse(command=command, score=0.9, args=args)
+            return result
         # Classified as unit but couldn't parse — still return a parse
-        return Parse(command="convert_units", score=0.9, args={})
+        return ("convert_units", {})
 
     if cls == "math":
-        result = _parse_math(text)
+        result = _parse_math(t)
         if result:
-            command, args = result
-            return Parse(command=command, score=0.9, args=args)
+            return result
         # Fall through to try units
-        result = _parse_unit_conversion(text)
+        result = _parse_unit_conversion(t)
         if result:
             value, from_unit, to_unit = result
-            return Parse(command="convert_units", score=0.9,
-                         args={"value": value, "from_unit": from_unit, "to_unit": to_unit})
+            return ("convert_units",
+                    {"value": value, "from_unit": from_unit, "to_unit": to_unit})
         # Classified as math but couldn't parse
-        return Parse(command="binary_op", score=0.9, args={})
+        return ("binary_op", {})
 
     return None
 
 
+def _handle_convert_units(p):
+    value = p.args.get("value")
+    from_unit = p.args.get("from_unit")
+    to_unit = p.args.get("to_unit")
+    if value is None or from_unit is None or to_unit is None:
+        return "Sorry, I couldn't figure out that conversion."
+    try:
+        result_val = _convert(value, from_unit, to_unit)
+        src_unit_name = _fmt_unit(from_unit, value)
+        dst_unit_name = _fmt_unit(to_unit, result_val)
+        if _is_temperature(from_unit) or _is_temperature(to_unit):
+            return (f"{_fmt_number(value)} {src_unit_name} "
+                    f"is {_fmt_number(result_val)} {dst_unit_name}.")
+        return (f"There are {_fmt_number(result_val)} {dst_unit_name} "
+                f"in {_fmt_number(value)} {src_unit_name}.")
+    except Exception:
+        return "Sorry, I couldn't figure out that conversion."
+
+
+def _handle_sqrt(p):
+    n = p.args.get("n")
+    if n is None:
+        return "Sorry, I couldn't figure out that calculation."
+    result = math.sqrt(n)
+    return f"The square root of {_fmt_number(n)} is {_fmt_number(result)}."
+
+
+def _handle_power(p):
+    n = p.args.get("n")
+    exp = p.args.get("exp")
+    if n is None or exp is None:
+        return "Sorry, I couldn't figure out that calculation."
+    result = n ** exp
+    if exp == 2:
+        return f"{_fmt_number(n)} squared is {_fmt_number(result)}."
+    elif exp == 3:
+        return f"{_fmt_number(n)} cubed is {_fmt_number(result)}."
+    return f"{_fmt_number(n)} to the power of {exp} is {_fmt_number(result)}."
+
+
+def _handle_percent(p):
+    pct = p.args.get("pct")
+    base = p.args.get("base")
+    if pct is None or base is None:
+        return "Sorry, I couldn't figure out that calculation."
+    result = (pct / 100) * base
+    return f"{_fmt_number(pct)}% of {_fmt_number(base)} is {_fmt_number(result)}."
+
+
+def _handle_binary_op(p):
+    a = p.args.get("a")
+    b = p.args.get("b")
+    op = p.args.get("op")
+    op_word = p.args.get("op_word")
+    if a is None or b is None or op is None:
+        return "Sorry, I couldn't figure out that calculation."
+    if op == "/" and b == 0:
+        return "I can't divide by zero."
+    result = _OP_FUNCS[op](a, b)
+    return f"{_fmt_number(a)} {op_word} {_fmt_number(b)} is {_fmt_number(result)}."
+
+
+_HANDLERS = {
+    "convert_units": _handle_convert_units,
+    "sqrt": _handle_sqrt,
+    "power": _handle_power,
+    "percent": _handle_percent,
+    "binary_op": _handle_binary_op,
+}
+
+
 def handle(p):
-    if p.command == "convert_units":
-        value = p.args.get("value")
-        from_unit = p.args.get("from_unit")
-        to_unit = p.args.get("to_unit")
-        if value is None or from_unit is None or to_unit is None:
-            return "Sorry, I couldn't figure out that conversion."
-        try:
-            result = _ureg.Quantity(value, from_unit).to(to_unit)
-            result_val = result.magnitude
-            src_unit_name = _fmt_unit(from_unit, value)
-            dst_unit_name = _fmt_unit(to_unit, result_val)
-            if _is_temperature(from_unit) or _is_temperature(to_unit):
-                return (f"{_fmt_number(value)} {src_unit_name} "
-                        f"is {_fmt_number(result_val)} {dst_unit_name}.")
-            return (f"There are {_fmt_number(result_val)} {dst_unit_name} "
-                    f"in {_fmt_number(value)} {src_unit_name}.")
-        except Exception:
-            return "Sorry, I couldn't figure out that conversion."
-
-    elif p.command == "sqrt":
-        n = p.args.get("n")
-        if n is None:
-            return "Sorry, I couldn't figure out that calculation."
-        result = math.sqrt(n)
-        return f"The square root of {_fmt_number(n)} is {_fmt_number(result)}."
-
-    elif p.command == "power":
-        n = p.args.get("n")
-        exp = p.args.get("exp")
-        if n is None or exp is None:
-            return "Sorry, I couldn't figure out that calculation."
-        result = n ** exp
-        if exp == 2:
-            return f"{_fmt_number(n)} squared is {_fmt_number(result)}."
-        elif exp == 3:
-            return f"{_fmt_number(n)} cubed is {_fmt_number(result)}."
-        return f"{_fmt_number(n)} to the power of {exp} is {_fmt_number(result)}."
-
-    elif p.command == "percent":
-        pct = p.args.get("pct")
-        base = p.args.get("base")
-        if pct is None or base is None:
-            return "Sorry, I couldn't figure out that calculation."
-        result = (pct / 100) * base
-        return f"{_fmt_number(pct)}% of {_fmt_number(base)} is {_fmt_number(result)}."
-
-    elif p.command == "binary_op":
-        a = p.args.get("a")
-        b = p.args.get("b")
-        op = p.args.get("op")
-        op_word = p.args.get("op_word")
-        if a is None or b is None or op is None:
-            return "Sorry, I couldn't figure out that calculation."
-        if op == "/" and b == 0:
-            return "I can't divide by zero."
-        result = eval(f"{a} {op} {b}")
-        return f"{_fmt_number(a)} {op_word} {_fmt_number(b)} is {_fmt_number(result)}."
-
-    return "Sorry, I didn't understand that."
+    handler = _HANDLERS.get(p.command)
+    if handler is None:
+        return "Sorry, I didn't understand that."
+    return handler(p)
 
 
 # --- Standalone test ---
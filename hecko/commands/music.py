@@ -15,16 +15,14 @@ Handles:
 import os
 import random
 import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
-import spotipy
-from spotipy.oauth2 import SpotifyOAuth
-from hecko.spotify_credentials import (
-    SPOTIFY_CLIENT_ID,
-    SPOTIFY_CLIENT_SECRET,
-    SPOTIFY_REDIRECT_URI,
-)
 from hecko.commands.parse import Parse
+from hecko.commands.preprocess import preprocess
+from hecko.commands.warmup import run_in_background
 
 # Spotify OAuth scopes we need
 _SCOPES = " ".join([
@@ -40,107 +38,271 @@ _CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), ".spotipy
 
 # Lazy-init Spotify client
 _sp = None
-
-# Playlist cache: list of (name, id) tuples, refreshed periodically
+_sp_lock = threading.Lock()
+
+# spotipy refreshes an access token once it is within 60 s of expiring; the
+# warm-up thread wakes a little inside that window to do it ahead of time
+_TOKEN_REFRESH_LEAD = 50
+_TOKEN_RETRY_MIN = 60    # first retry after a failed refresh, doubling...
+_TOKEN_RETRY_MAX = 3600  # ...up to once an hour
+
+# Device cache: the id of the device commands go to, refreshed periodically,
+# and its volume as last reported by Spotify or set by us. The volume can be
+# changed on the player at any time, so it's trusted only briefly.
+_device_id = None
+_device_volume = None
+_device_id_time = 0
+_device_volume_time = 0
+_DEVICE_TTL = 60  # 1 minute
+_VOLUME_TTL = 5
+
+# Playlist cache: list of (name, id, normalized name, word set) tuples,
+# refreshed periodically
 _playlist_cache = []
 _playlist_cache_time = 0
 _PLAYLIST_CACHE_TTL = 600  # 10 minutes
+# Lookups into _playlist_cache, rebuilt along with it
+_playlist_by_norm = {}     # normalized name -> index of the first playlist with it
+_playlist_word_index = {}  # word -> indices of playlists whose name has that word
+_playlist_vocab = {}       # word -> its bit in the word masks below
+_playlist_masks = []       # per playlist: its word set as a bitmask over _playlist_vocab
 
 
 def _get_sp():
     """Get or create the authenticated Spotify client."""
     global _sp
-    if _sp is None:
-        auth = SpotifyOAuth(
-            scope=_SCOPES,
-            open_browser=True,
-            cache_path=_CACHE_PATH,
-            client_id=SPOTIFY_CLIENT_ID,
-            client_secret=SPOTIFY_CLIENT_SECRET,
-            redirect_uri=SPOTIFY_REDIRECT_URI,
-        )
-        _sp = spotipy.Spotify(auth_manager=auth)
+    if _sp is not None:
+        return _sp
+    with _sp_lock:
+        if _sp is None:
+            # Imported here so parsing music commands doesn't load spotipy
+            from hecko.spotify_credentials import (
+                SPOTIFY_CLIENT_ID,
+                SPOTIFY_CLIENT_SECRET,
+                SPOTIFY_REDIRECT_URI,
+            )
+            import spotipy
+            from spotipy.oauth2 import SpotifyOAuth
+            auth = SpotifyOAuth(
+                scope=_SCOPES,
+                open_browser=True,
+                cache_path=_CACHE_PATH,
+                client_id=SPOTIFY_CLIENT_ID,
+                client_secret=SPOTIFY_CLIENT_SECRET,
+                redirect_uri=SPOTIFY_REDIRECT_URI,
+            )
+            _sp = spotipy.Spotify(auth_manager=auth)
     return _sp
 
 
+def _refresh_token():
+    """Refresh the cached OAuth token if it is about to expire.
+
+    Returns the token info, or None if there is no usable cached token. Never
+    starts the interactive browser login; the first command does that.
+    """
+    auth = _get_sp().auth_manager
+    return auth.validate_token(auth.cache_handler.get_cached_token())
+
+
+def _keep_token_fresh():
+    retry_delay = _TOKEN_RETRY_MIN
+    while True:
+        try:
+            token = _refresh_token()
+        except ImportError:
+            return  # spotipy or spotify_credentials missing; commands report it
+        except Exception as e:
+            from spotipy.oauth2 import SpotifyOauthError
+            if isinstance(e, SpotifyOauthError):
+                return  # refresh token revoked or bad client; needs a new login
+            # Network trouble: try again, backing off while it lasts
+            time.sleep(retry_delay)
+            retry_delay = min(retry_delay * 2, _TOKEN_RETRY_MAX)
+            continue
+        if token is None:
+            return  # not logged in yet
+        retry_delay = _TOKEN_RETRY_MIN
+        time.sleep(max(token["expires_at"] - _TOKEN_REFRESH_LEAD - time.time(), 1))
+
+
+def warm_up():
+    """Refresh the Spotify token in the background, and keep it fresh.
+
+    Called at startup so the first music command after a long idle doesn't
+    wait for an OAuth round trip.
+    """
+    run_in_background(_keep_token_fresh, "spotify-token")
+
+
 def _get_device_id():
-    """Find an active Spotify device, or fall back to the first available."""
+    """Find an active Spotify device, or fall back to the first available.
+
+    Cached for _DEVICE_TTL seconds, so back-to-back commands don't each ask
+    Spotify for the device list.
+    """
+    if _device_fresh():
+        return _device_id
     sp = _get_sp()
     devices = sp.devices().get("devices", [])
     if not devices:
         raise RuntimeError("No Spotify devices found. Open Spotify on your Mac first.")
     for d in devices:
         if d.get("is_active"):
+            _remember_device(d)
             return d["id"]
+    _remember_device(devices[0])
     return devices[0]["id"]
 
 
+def _device_fresh():
+    return _device_id is not None and (time.time() - _device_id_time) < _DEVICE_TTL
+
+
+def _volume_fresh():
+    return (_device_fresh() and _device_volume is not None
+            and (time.time() - _device_volume_time) < _VOLUME_TTL)
+
+
+def _remember_device(device):
+    """Cache a device dict's id and volume, e.g. the active device from a
+    playback state response."""
+    global _device_id, _device_id_time
+    if device.get("id"):
+        _device_id = device["id"]
+        _device_id_time = time.time()
+        _remember_volume(device.get("volume_percent"))
+
+
+def _remember_volume(volume):
+    global _device_volume, _device_volume_time
+    _device_volume = volume
+    _device_volume_time = time.time()
+
+
+def _forget_device():
+    """Drop the cached device; called when a Spotify request fails."""
+    global _device_id
+    _device_id = None
+
+
 # --- Volume ducking ---
 
 _saved_volume = None
+_saved_device_id = None
 
 
 def duck_volume(level=10):
     """Lower Spotify volume, saving the current level for later restore."""
-    global _saved_volume
+    global _saved_volume, _saved_device_id
     try:
         sp = _get_sp()
-        pb = sp.current_playback()
-        if pb and pb.get("device"):
-            _saved_volume = pb["device"].get("volume_percent")
-            sp.volume(level, device_id=pb["device"]["id"])
+        # If the volume was seen moments ago, trust it rather than fetching
+        # the whole playback state
+        if _volume_fresh():
+            device_id, volume = _device_id, _device_volume
+        else:
+            pb = sp.current_playback()
+            if not (pb and pb.get("device")):
+                return
+            _remember_device(pb["device"])
+            device_id, volume = pb["device"]["id"], pb["device"].get("volume_percent")
+        _saved_volume, _saved_device_id = volume, device_id
+        sp.volume(level, device_id=device_id)
+        if device_id == _device_id:
+            _remember_volume(level)
     except Exception:
-        pass
+        _forget_device()
 
 
 def restore_volume():
-    """Restore Spotify volume to the level saved by duck_volume()."""
-    global _saved_volume
+    """Restore Spotify volume to the level saved by duck_volume(), on the
+    device it was ducked on."""
+    global _saved_volume, _saved_device_id
     if _saved_volume is None:
         return
     try:
         sp = _get_sp()
-        device_id = _get_device_id()
-        sp.volume(_saved_volume, device_id=device_id)
+        sp.volume(_saved_volume, device_id=_saved_device_id)
+        if _saved_device_id == _device_id:
+            _remember_volume(_saved_volume)
     except Exception:
-        pass
+        _forget_device()
     finally:
-        _saved_volume = None
+        _saved_volume = _saved_device_id = None
+
+
+def _fetch_pages(fetch, limit, max_items=None):
+    """Return the items of every page of a paged Spotify endpoint, in order.
+
+    fetch(limit=, offset=) gets one page. The first page says how many items
+    there are in total; the rest are fetched in parallel. With max_items,
+    stops after the page that reaches it.
+    """
+    first = fetch(limit=limit, offset=0)
+    pages = [first]
+    total = first.get("total", 0)
+    if max_items is not None:
+        total = min(total, max_items)
+    offsets = range(limit, total, limit)
+    if offsets:
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            pages += pool.map(lambda offset: fetch(limit=limit, offset=offset), offsets)
+    return [item for page in pages for item in page.get("items", [])]
 
 
 def _get_playlists():
-    """Return cached list of (name, id) tuples, refreshing if stale."""
-    global _playlist_cache, _playlist_cache_time
+    """Return cached list of (name, id, norm, words) tuples, refreshing if stale.
+
+    norm and words are _normalize(name) and _word_set(name), computed once
+    here so _find_playlist doesn't redo them for every playlist on every query.
+    """
+    global _playlist_cache, _playlist_cache_time, _playlist_by_norm, _playlist_word_index
+    global _playlist_vocab, _playlist_masks
     now = time.time()
     if _playlist_cache and (now - _playlist_cache_time) < _PLAYLIST_CACHE_TTL:
         return _playlist_cache
 
     sp = _get_sp()
     playlists = []
-    offset = 0
-    limit = 50
-    while True:
-        page = sp.current_user_playlists(limit=limit, offset=offset)
-        items = page.get("items", [])
-        for p in items:
-            playlists.append((p["name"], p["id"]))
-        if not items or len(items) < limit:
-            break
-        offset += limit
+    for p in _fetch_pages(sp.current_user_playlists, limit=50):
+        name = p["name"]
+        playlists.append((name, p["id"], _normalize(name), _word_set(name)))
+
+    by_norm = {}
+    word_index = {}
+    vocab = {}
+    masks = []
+    for i, (_, _, norm, words) in enumerate(playlists):
+        by_norm.setdefault(norm, i)
+        mask = 0
+        for w in words:
+            word_index.setdefault(w, []).append(i)
+            mask |= 1 << vocab.setdefault(w, len(vocab))
+        masks.append(mask)
 
     _playlist_cache = playlists
+    _playlist_by_norm = by_norm
+    _playlist_word_index = word_index
+    _playlist_vocab = vocab
+    _playlist_masks = masks
     _playlist_cache_time = now
     return playlists
 
 
+_PUNCT_RE = re.compile(r"[^\w\s]")
+
+
+@lru_cache(maxsize=1024)
 def _normalize(s):
     """Lowercase and strip punctuation for fuzzy comparison."""
-    return re.sub(r"[^\w\s]", "", s.lower()).strip()
+    return _PUNCT_RE.sub("", s.lower()).strip()
 
 
+@lru_cache(maxsize=1024)
 def _word_set(s):
-    """Split normalized string into a set of words."""
-    return set(_normalize(s).split())
+    """Split normalized string into a frozenset of words."""
+    return frozenset(_normalize(s).split())
 
 
 def _find_playlist(name):
@@ -151,44 +313,54 @@ def _find_playlist(name):
     2. Query words are a subset of playlist name words
     3. Playlist name words are a subset of query words
     4. Any word overlap, ranked by fraction of shared words
+
+    Compares against the normalized names, word sets and lookups that
+    _get_playlists() builds, so those must stay in step with _normalize().
     """
     playlists = _get_playlists()
     query_norm = _normalize(name)
     query_words = _word_set(name)
 
     # 1. Exact match
-    for pname, pid in playlists:
-        if _normalize(pname) == query_norm:
-            return (pname, pid)
+    i = _playlist_by_norm.get(query_norm)
+    if i is not None:
+        pname, pid, _, _ = playlists[i]
+        return (pname, pid)
 
     # 2. Query is a substring of (or contains) the playlist name
-    for pname, pid in playlists:
-        pnorm = _normalize(pname)
+    for pname, pid, pnorm, _ in playlists:
         if query_norm in pnorm or pnorm in query_norm:
             return (pname, pid)
 
-    # 3-5. Word-overlap matching
+    # 3-5. Word-overlap matching, over only the playlists sharing a word
+    # with the query (in list order, so ties still go to the first)
+    candidates = sorted({i for w in query_words for i in _playlist_word_index.get(w, ())})
+    # Set operations on word bitmasks. Query words no playlist has can't
+    # overlap, but they still rule out "query words all in playlist name".
+    query_mask = 0
+    for w in query_words:
+        bit = _playlist_vocab.get(w)
+        if bit is not None:
+            query_mask |= 1 << bit
+    query_known = query_mask.bit_count() == len(query_words)
     best = None
     best_score = 0
-    for pname, pid in playlists:
-        pw = _word_set(pname)
-        if not pw or not query_words:
-            continue
-        overlap = query_words & pw
-        if not overlap:
-            continue
+    for i in candidates:
+        pw = _playlist_masks[i]
+        shared = query_mask & pw
+        overlap = shared.bit_count()
         # Query words all appear in playlist name
-        if query_words <= pw:
-            s = 0.9 + len(overlap) / (len(pw) + 10)  # prefer tighter matches
+        if query_known and shared == query_mask:
+            s = 0.9 + overlap / (pw.bit_count() + 10)  # prefer tighter matches
         # Playlist name words all appear in query
-        elif pw <= query_words:
-            s = 0.8 + len(overlap) / (len(query_words) + 10)
+        elif shared == pw:
+            s = 0.8 + overlap / (len(query_words) + 10)
         # Partial overlap
         else:
-            s = len(overlap) / max(len(query_words), len(pw))
+            s = overlap / max(len(query_words), pw.bit_count())
         if s > best_score:
             best_score = s
-            best = (pname, pid)
+            best = playlists[i][:2]
 
     # Require decent quality: subset matches always pass (score >= 0.8),
     # partial overlap needs more than half the query words to match
@@ -202,19 +374,10 @@ def _play_liked_songs():
     sp = _get_sp()
     # Fetch up to 200 liked songs (4 pages of 50)
     uris = []
-    offset = 0
-    limit = 50
-    max_tracks = 200
-    while offset < max_tracks:
-        page = sp.current_user_saved_tracks(limit=limit, offset=offset)
-        items = page.get("items", [])
-        for item in items:
-            track = item.get("track")
-            if track and track.get("uri"):
-                uris.append(track["uri"])
-        if not items or len(items) < limit:
-            break
-        offset += limit
+    for item in _fetch_pages(sp.current_user_saved_tracks, limit=50, max_items=200):
+        track = item.get("track")
+        if track and track.get("uri"):
+            uris.append(track["uri"])
 
     if not uris:
         raise RuntimeError("Your Liked Songs library is empty.")
@@ -228,6 +391,33 @@ def _play_liked_songs():
 
 # --- Command classification ---
 
+_PAUSE_RE = re.compile(r"\b(pause|hold)\b.*\b(music|song|spotify|playback)\b", re.I | re.A)
+_PAUSE_THE_RE = re.compile(r"\b(pause|hold)\b\s*(the\s+)?(music|song)", re.I | re.A)
+_RESUME_RE = re.compile(r"\b(resume|unpause|continue)\b.*\b(music|song|spotify|playback)\b", re.I | re.A)
+_RESUME_THE_RE = re.compile(r"\b(resume|unpause|continue)\b\s*(the\s+)?(music|song)", re.I | re.A)
+_STOP_RE = re.compile(r"\b(stop)\b.*\b(music|song|spotify|playback)\b", re.I | re.A)
+_STOP_THE_RE = re.compile(r"\bstop\b\s*(the\s+)?(music|song)", re.I | re.A)
+_SKIP_RE = re.compile(r"\b(skip|next)\b.*\b(song|track)\b", re.I | re.A)
+_WHATS_PLAYING_RE = re.compile(r"\bwhat(?:'s|\s+is)\s+playing\b", re.I | re.A)
+_WHAT_SONG_RE = re.compile(r"\bwhat\s+song\s+is\s+this\b", re.I | re.A)
+_PLAY_MUSIC_RE = re.compile(
+    r"\b(play|have|hear|put on|throw on|turn on|start|how about|i want|i'd like)"
+    r"\s+(?:some|the)?\s*music\b", re.I | re.A)
+_LETS_MUSIC_RE = re.compile(
+    r"\blet(?:'s|s| us)\s+(?:play|have|hear|listen to|get)\s+(?:some\s+)?music\b", re.I | re.A)
+_MUSIC_PLEASE_RE = re.compile(r"\bmusic\s*,?\s*please\b", re.I | re.A)
+_PLAY_RE = re.compile(r"(?:.*?\b)?play\s+(.*)", re.I | re.A)
+_SOME_MUSIC_RE = re.compile(r"(?:some\s+)?music$", re.I | re.A)
+_MY_PLAYLIST_RE = re.compile(r"(?:my|the)\s+(.+?)\s+playlist$", re.I | re.A)
+_PLAYLIST_RE = re.compile(r"(.+?)\s+playlist$", re.I | re.A)
+_BY_ARTIST_RE = re.compile(r"(.+?)\s+by\s+(.+)$", re.I | re.A)
+_WEAK_RE = re.compile(r"\b(music|spotify|song|playlist)\b", re.I | re.A)
+
+# Every pattern above except _WEAK_RE needs one of these words
+_TRIGGER_WORDS = ("play", "pause", "hold", "resume", "continue", "stop", "skip",
+                  "next", "song", "music")
+
+
 def _classify(text):
     """Classify the music command.
 
@@ -243,68 +433,59 @@ def _classify(text):
     Or None if not a music command.
     """
     t = text.strip()
+    tl = preprocess(text).lower
+    if not any(w in tl for w in _TRIGGER_WORDS):
+        return None
 
     # Pause
-    if re.search(r"\b(pause|hold)\b.*\b(music|song|spotify|playback)\b", t, re.I) or \
-       re.search(r"\b(pause|hold)\b\s*(the\s+)?(music|song)", t, re.I) or \
+    if _PAUSE_RE.search(t) or _PAUSE_THE_RE.search(t) or \
        t.strip().lower() in ("pause", "pause music", "pause the music"):
         return ("pause", None)
 
     # Resume / unpause
-    if re.search(r"\b(resume|unpause|continue)\b.*\b(music|song|spotify|playback)\b", t, re.I) or \
-       re.search(r"\b(resume|unpause|continue)\b\s*(the\s+)?(music|song)", t, re.I) or \
+    if _RESUME_RE.search(t) or _RESUME_THE_RE.search(t) or \
        t.strip().lower() in ("resume", "resume music", "unpause", "resume the music"):
         return ("resume", None)
 
     # Stop
-    if re.search(r"\b(stop)\b.*\b(music|song|spotify|playback)\b", t, re.I) or \
-       re.search(r"\bstop\b\s*(the\s+)?(music|song)", t, re.I):
+    if _STOP_RE.search(t) or _STOP_THE_RE.search(t):
         return ("stop", None)
 
     # Skip / next
-    if re.search(r"\b(skip|next)\b.*\b(song|track)\b", t, re.I) or \
+    if _SKIP_RE.search(t) or \
        t.strip().lower() in ("skip", "next", "next song", "skip song"):
         return ("skip", None)
 
     # What's playing
-    if re.search(r"\bwhat(?:'s|\s+is)\s+playing\b", t, re.I) or \
-       re.search(r"\bwhat\s+song\s+is\s+this\b", t, re.I):
+    if _WHATS_PLAYING_RE.search(t) or _WHAT_SONG_RE.search(t):
         return ("now_playing", None)
 
     # Generic "play some music" variants (before specific "play X" parsing)
-    if re.search(
-        r"\b(play|have|hear|put on|throw on|turn on|start|how about|i want|i'd like)"
-        r"\s+(?:some|the)?\s*music\b", t, re.I):
-        return ("play_music", None)
-    if re.search(
-        r"\blet(?:'s|s| us)\s+(?:play|have|hear|listen to|get)\s+(?:some\s+)?music\b",
-        t, re.I):
-        return ("play_music", None)
-    if re.search(r"\bmusic\s*,?\s*please\b", t, re.I):
+    if _PLAY_MUSIC_RE.search(t) or _LETS_MUSIC_RE.search(t) or _MUSIC_PLEASE_RE.search(t):
         return ("play_music", None)
 
     # Play commands — must start with "play"
-    m = re.match(r"(?:.*?\b)?play\s+(.*)", t, re.I)
+    m = _PLAY_RE.match(t)
     if not m:
         return None
     rest = m.group(1).strip().rstrip(".")
 
     # "play some music" / "play music" (fallback for edge cases)
-    if re.match(r"(?:some\s+)?music$", rest, re.I):
+    if _SOME_MUSIC_RE.match(rest):
         return ("play_music", None)
 
     # "play my X playlist" / "play the X playlist"
-    pm = re.match(r"(?:my|the)\s+(.+?)\s+playlist$", rest, re.I)
+    pm = _MY_PLAYLIST_RE.match(rest)
     if pm:
         return ("play_playlist", pm.group(1).strip())
 
     # "play X playlist"
-    pm = re.match(r"(.+?)\s+playlist$", rest, re.I)
+    pm = _PLAYLIST_RE.match(rest)
     if pm:
         return ("play_playlist", pm.group(1).strip())
 
     # "play TITLE by ARTIST"
-    pm = re.match(r"(.+?)\s+by\s+(.+)$", rest, re.I)
+    pm = _BY_ARTIST_RE.match(rest)
     if pm:
         return ("play_track", (pm.group(1).strip(), pm.group(2).strip()))
 
@@ -328,7 +509,7 @@ def parse(text):
         return Parse(command=action, score=0.9, args=args)
 
     # Weak: mentions music/spotify/song
-    if re.search(r"\b(music|spotify|song|playlist)\b", text, re.I):
+    if _WEAK_RE.search(text):
         return Parse(command="play_music", score=0.4, args={})
     return None
 
@@ -360,6 +541,8 @@ def handle(p):
         elif p.command == "now_playing":
             sp = _get_sp()
             pb = sp.current_playback()
+            if pb and pb.get("device"):
+                _remember_device(pb["device"])
             if not pb or not pb.get("item"):
                 return "Nothing is playing right now."
             item = pb["item"]
@@ -408,6 +591,7 @@ def handle(p):
             return f"Playing {track_name} by {track_artist}."
 
     except Exception as e:
+        _forget_device()
         return f"Sorry, I had trouble with Spotify: {e}"
 
     return "Sorry, I didn't understand that music command."
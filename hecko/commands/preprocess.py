@@ -0,0 +1,24 @@
+"""Shared preprocessing of an utterance for the command parsers.
+
+Every command module's parse(text) is called with the same text, and many of
+them start by normalizing it the same way. preprocess(text) does that work
+once per utterance and hands every caller the same Text.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+
+
+@dataclass(frozen=True)
+class Text:
+    lower: str            # lowercased, surrounding whitespace stripped
+    first_word: str       # first word of lower, without trailing punctuation
+
+
+@lru_cache(maxsize=16)
+def preprocess(text):
+    """Return the (cached) Text for an utterance."""
+    lower = text.lower().strip()
+    words = lower.split(maxsplit=1)
+    first_word = words[0].rstrip(",.:;?!") if words else ""
+    return Text(lower=lower, first_word=first_word)
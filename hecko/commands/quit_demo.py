@@ -1,8 +1,10 @@
 """Quit demo command: exits the main loop."""
 
+import threading
 from difflib import SequenceMatcher
 
 from hecko.commands.parse import Parse
+from hecko.commands.preprocess import preprocess
 
 _PHRASES = [
     "quit demo",
@@ -19,19 +21,31 @@ _PHRASES = [
     "quit them oh",
     "quit thermal",
 ]
+_PHRASE_SET = frozenset(_PHRASES)
+# One matcher per phrase. SequenceMatcher caches its analysis of the second
+# sequence, so only the utterance is swapped in per call. set_seq1 mutates
+# them, and the voice loop and Telegram bot both parse, so they're locked.
+_MATCHERS = [SequenceMatcher(None, "", phrase) for phrase in _PHRASES]
+_matchers_lock = threading.Lock()
 
 quit_requested = False
 
 
 def parse(text):
-    t = text.lower().strip().rstrip(".")
+    t = preprocess(text).lower.rstrip(".")
+    if t in _PHRASE_SET:
+        return Parse(command="quit", score=1.0)
     best_score = 0.0
-    for phrase in _PHRASES:
-        if t == phrase:
-            return Parse(command="quit", score=1.0)
-        ratio = SequenceMatcher(None, t, phrase).ratio()
-        if ratio > best_score:
-            best_score = ratio
+    with _matchers_lock:
+        for matcher in _MATCHERS:
+            matcher.set_seq1(t)
+            # real_quick_ratio() is an upper bound from the lengths alone; skip
+            # phrases that can't pass the cutoff or beat the best so far
+            if matcher.real_quick_ratio() <= max(best_score, 0.75):
+                continue
+            ratio = matcher.ratio()
+            if ratio > best_score:
+                best_score = ratio
     if best_score > 0.75:
         return Parse(command="quit", score=best_score)
     return None
@@ -118,6 +118,10 @@ _WORD_NUM_RE = re.compile(
 )
 
 
+# Dots and spaces in STT am/pm variants ("p.m.", "p m"), removed in one pass
+_AMPM_STRIP = str.maketrans("", "", ". ")
+
+
 def _replace_word_numbers(text):
     """Replace word numbers (one-twelve) with digits."""
     return _WORD_NUM_RE.sub(lambda m: _WORD_NUMBERS[m.group(1).lower()], text)
@@ -149,7 +153,7 @@ def parse_time(text):
     m = re.search(r"\b(\d{1,2})[:.](\d{2})\s*(a\.?\s*m\.?|p\.?\s*m\.?)?\b", t)
     if m:
         hour, minute = int(m.group(1)), int(m.group(2))
-        ampm = (m.group(3) or "").replace(".", "").replace(" ", "")
+        ampm = (m.group(3) or "").translate(_AMPM_STRIP)
         hour = _apply_ampm(hour, ampm, t)
         if not ampm and 1 <= hour <= 11:
             return _next_occurrence_12h(hour, minute)
@@ -163,7 +167,7 @@ def parse_time(text):
             hour, minute = int(digits[0]), int(digits[1:])
         else:
             hour, minute = int(digits[:2]), int(digits[2:])
-        ampm = m.group(2).replace(".", "").replace(" ", "")
+        ampm = m.group(2).translate(_AMPM_STRIP)
         hour = _apply_ampm(hour, ampm, t)
         return _next_occurrence(hour, minute)
 
@@ -171,7 +175,7 @@ def parse_time(text):
     m = re.search(r"\b(\d{1,2})\s+(\d{2})\s*(a\.?\s*m\.?|p\.?\s*m\.?)\b", t)
     if m:
         hour, minute = int(m.group(1)), int(m.group(2))
-        ampm = m.group(3).replace(".", "").replace(" ", "")
+        ampm = m.group(3).translate(_AMPM_STRIP)
         hour = _apply_ampm(hour, ampm, t)
         return _next_occurrence(hour, minute)
 
@@ -179,7 +183,7 @@ def parse_time(text):
     m = re.search(r"\b(\d{1,2})\s*(a\.?\s*m\.?|p\.?\s*m\.?)\b", t)
     if m:
         hour = int(m.group(1))
-        ampm = m.group(2).replace(".", "").replace(" ", "")
+        ampm = m.group(2).translate(_AMPM_STRIP)
         hour = _apply_ampm(hour, ampm, t)
         return _next_occurrence(hour, 0)
 
@@ -11,6 +11,9 @@ Handles:
 from hecko.commands.parse import Parse
 from hecko.commands.template import TemplatePattern
 
+# Every pattern starts with one of this module's words in
+# commands._FIRST_TOKENS; keep that set in step with them
+
 _PATTERNS = [
     TemplatePattern("say that again"),
     TemplatePattern("repeat that"),
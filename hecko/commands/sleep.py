@@ -11,10 +11,14 @@ While sleeping, the router ignores and does not log all other commands.
 """
 
 from hecko.commands.parse import Parse
+from hecko.commands.preprocess import preprocess
 from hecko.commands.template import TemplatePattern
 
 sleeping = False
 
+# Every sleep/wake pattern starts with one of this module's words in
+# commands._FIRST_TOKENS; keep that set in step with them
+
 _SLEEP_PATTERNS = [
     TemplatePattern("go to sleep"),
     TemplatePattern("stop listening"),
@@ -38,7 +42,7 @@ _WAKE_PATTERNS = [
 
 
 def parse(text):
-    t = text.strip().rstrip(".!").lower()
+    t = preprocess(text).lower.rstrip(".!")
     if sleeping:
         for p in _WAKE_PATTERNS:
             if p.match(t) is not None:
@@ -26,6 +26,7 @@ class TemplatePattern:
 
     def __init__(self, template, greedy=False):
         self.template = template
+        self.greedy = greedy
         self._regex, self._group_map = _compile(template, greedy)
 
     def match(self, text):
@@ -33,17 +34,48 @@ class TemplatePattern:
         m = self._regex.match(text.strip().rstrip("?!.,"))
         if m is None:
             return None
-        result = {}
-        for group_num, field_name in self._group_map.items():
-            value = m.group(group_num)
-            if value is not None:
-                result[field_name] = value.strip()
-        return result
+        return _extract_fields(m, self._group_map)
 
     def __repr__(self):
         return f"TemplatePattern({self.template!r})"
 
 
+class TemplateSet:
+    """A list of (template, tag) pairs compiled into a single regex.
+
+    match() gives the same result as match_any() over the same pairs (the
+    first template in list order wins), but scans the text with one
+    alternation instead of one regex per template.
+    """
+
+    def __init__(self, templates):
+        compiler = _Compiler()
+        alts = []
+        # Parallel lookups keyed by each template's wrapper group number
+        self._tags = {}
+        self._group_maps = {}
+        for tmpl, tag in templates:
+            if isinstance(tmpl, str):
+                tmpl = TemplatePattern(tmpl)
+            compiler.greedy = tmpl.greedy
+            compiler.group_count += 1  # the wrapper group itself
+            wrapper = compiler.group_count
+            compiler.group_map = {}
+            alts.append("(" + compiler._compile_fragment(tmpl.template) + ")")
+            self._tags[wrapper] = tag
+            self._group_maps[wrapper] = compiler.group_map
+        self._regex = re.compile("^(?:" + "|".join(alts) + ")$", re.IGNORECASE)
+
+    def match(self, text):
+        """Match text against all templates. Returns (tag, fields_dict) or None."""
+        m = self._regex.match(text.strip().rstrip("?!.,"))
+        if m is None:
+            return None
+        # The wrapper group encloses its fields, so it is always the last to close
+        wrapper = m.lastindex
+        return self._tags[wrapper], _extract_fields(m, self._group_maps[wrapper])
+
+
 def template_match(template, text, greedy=False):
     """One-shot match: compile template and match text. Returns dict or None."""
     return TemplatePattern(template, greedy).match(text)
@@ -145,6 +177,16 @@ def _split_alternatives(text):
     return alts
 
 
+def _extract_fields(m, group_map):
+    """Build the fields dict from a regex match and its group_map."""
+    result = {}
+    for group_num, field_name in group_map.items():
+        value = m.group(group_num)
+        if value is not None:
+            result[field_name] = value.strip()
+    return result
+
+
 def _compile(template, greedy=False):
     """Compile a template string to a (compiled_regex, group_map) tuple."""
     compiler = _Compiler(greedy)
@@ -312,4 +354,22 @@ if __name__ == "__main__":
           p.match("hello"),
           {})
 
+    # TemplateSet: same results as match_any, including list order
+    tset = TemplateSet(patterns)
+    for text in ["add milk to the list", "remove bread from the list",
+                 "how many items on the list", "hello there"]:
+        check(f"TemplateSet: {text}",
+              tset.match(text),
+              match_any(patterns, text))
+    tset = TemplateSet([
+        (TemplatePattern("[hi|hello] $name"), "first"),
+        (TemplatePattern("hi $a and $b", greedy=True), "second"),
+    ])
+    check("TemplateSet: earlier template wins",
+          tset.match("hi bob and alice"),
+          ("first", {"name": "bob and alice"}))
+    check("TemplateSet: fields numbered per template",
+          TemplateSet([("x $a", "one"), ("y $a $b", "two")]).match("y 1 2"),
+          ("two", {"a": "1", "b": "2"}))
+
     print(f"\n{passed} passed, {failed} failed out of {passed + failed} tests")
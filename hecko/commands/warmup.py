@@ -0,0 +1,20 @@
+"""Run a command module's slow first-use setup in the background at startup."""
+
+import threading
+
+
+def run_in_background(fn, name):
+    """Call fn() on a daemon thread named name, ignoring any error it raises.
+
+    fn is normally the module's lazy getter (which should build under a lock,
+    so a command arriving mid-warmup waits rather than building it again).
+    Errors are dropped because the first real command calls the getter again
+    and reports them to the user.
+    """
+    def run():
+        try:
+            fn()
+        except Exception:
+            pass
+
+    threading.Thread(target=run, name=name, daemon=True).start()
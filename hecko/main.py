@@ -13,7 +13,7 @@ from hecko.vad.silero import load_vad_model, SpeechRecorder
 from hecko.stt.whisper import load_model as load_whisper, transcribe
 from hecko.tts.piper import speak, play_sound
 from hecko.commands import router, ALL_COMMANDS
-from hecko.commands import timer, reminder, music, sleep, quit_demo
+from hecko.commands import timer, reminder, music, sleep, quit_demo, ask_claude, grocery, math_cmd
 
 # How long to wait for speech after wake word before playing the prompt
 _PRE_SPEECH_TIMEOUT = 0.5  # seconds
@@ -51,6 +51,13 @@ def main():
     for cmd in ALL_COMMANDS:
         router.register(cmd)
 
+    # Build network clients and the unit registry in the background, off the
+    # first command's path
+    ask_claude.warm_up()
+    grocery.warm_up()
+    math_cmd.warm_up()
+    music.warm_up()
+
     # Wire up timer/reminder announcements to TTS
     def announce(text):
         log(f"  [announce] {text}")
@@ -124,12 +124,13 @@ class SpeechRecorder:
         """Feed audio data. Call repeatedly with mic chunks.
 
         Args:
-            audio_chunk: numpy int16 array (16 kHz mono).
+            audio_chunk: numpy int16 array (16 kHz mono). May be a view into
+                the mic buffer; it is copied before being kept.
         """
         if self._done:
             return
 
-        self._recorded.append(audio_chunk)
+        self._recorded.append(audio_chunk.copy())
         self._total_samples += len(audio_chunk)
 
         # Check max duration
@@ -186,7 +187,7 @@ if __name__ == "__main__":
     audio = recorder.get_result()
     if audio is not None:
         duration = len(audio) / SAMPLE_RATE
-        peak = np.max(np.abs(audio))
+        peak = max(int(audio.max()), -int(audio.min()))
         print(f"\nRecorded {duration:.2f}s ({len(audio)} samples), peak={peak}")
         if peak < 100:
             print("Warning: very low signal.")
@@ -0,0 +1,94 @@
+"""Grocery commands against a stub Our Groceries client.
+
+Covers the items cache that our own adds and removes update in place: the
+duplicate check, the active-item count and the starred-item prefix.
+"""
+
+import pytest
+
+from hecko.commands import grocery
+
+
+class StubOurGroceries(grocery._KeepAliveOurGroceries):
+    """Stands in for the API client, keeping the shopping list in memory."""
+
+    items = []
+    fetches = 0
+
+    def __init__(self, username, password):
+        pass
+
+    async def login(self):
+        pass
+
+    async def get_my_lists(self):
+        return {"shoppingLists": [{"name": "Shopping List", "id": "list1"}]}
+
+    async def get_list_items(self, list_id):
+        type(self).fetches += 1
+        return {"list": {"items": [dict(i) for i in self.items]}}
+
+    async def add_item_to_list(self, list_id, value, auto_category=False):
+        self.items.append({"id": f"id{len(self.items)}", "value": value, "crossedOff": False})
+
+    async def remove_item_from_list(self, list_id, item_id):
+        self.items[:] = [i for i in self.items if i["id"] != item_id]
+
+
+@pytest.fixture
+def og(monkeypatch):
+    monkeypatch.setattr(grocery, "_KeepAliveOurGroceries", StubOurGroceries)
+    monkeypatch.setattr(StubOurGroceries, "items", [
+        {"id": "a", "value": "eggs", "crossedOff": False},
+        {"id": "b", "value": grocery._STAR + "bread", "crossedOff": False},
+        {"id": "c", "value": "flour", "crossedOff": True},
+    ])
+    monkeypatch.setattr(StubOurGroceries, "fetches", 0)
+    for name, value in [("_og", None), ("_list_id", None), ("_items_cache", None),
+                        ("_items_cache_ts", 0), ("_items_index", {}),
+                        ("_items_active_count", 0)]:
+        monkeypatch.setattr(grocery, name, value)
+    return StubOurGroceries
+
+
+def say(text):
+    p = grocery.parse(text)
+    assert p is not None, text
+    return grocery.handle(p)
+
+
+def test_add_then_count_then_remove(og):
+    assert say("how many items are on the shopping list") == \
+        "There are 2 items on your shopping list."
+    assert say("add milk to the shopping list") == "I've added milk to the shopping list."
+    assert say("how many items are on the shopping list") == \
+        "There are 3 items on your shopping list."
+    assert og.fetches == 1  # the add updated the cache in place
+
+    assert say("remove milk from the shopping list") == \
+        "I've removed milk from the shopping list."
+    assert say("how many items are on the shopping list") == \
+        "There are 2 items on your shopping list."
+    assert [i["value"] for i in og.items] == ["eggs", grocery._STAR + "bread", "flour"]
+
+
+def test_duplicate_add(og):
+    assert say("add milk to the shopping list") == "I've added milk to the shopping list."
+    assert say("add milk to the shopping list") == "milk is already on the shopping list."
+    assert say("add eggs to the shopping list") == "eggs is already on the shopping list."
+    assert [i["value"] for i in og.items].count("milk") == 1
+
+
+def test_starred_items(og):
+    assert say("do I have bread on the shopping list") == \
+        "Yes, bread is on the shopping list."
+    assert say("add butter to the shopping list and mark it important") == \
+        "I've added butter to the shopping list and marked it important."
+    assert og.items[-1]["value"] == grocery._STAR + "butter"
+    assert say("add butter to the shopping list") == "butter is already on the shopping list."
+    assert say("how many items are on the shopping list") == \
+        "There are 3 items on your shopping list."
+    assert say("remove butter from the shopping list") == \
+        "I've removed butter from the shopping list."
+    assert say("do I have butter on the shopping list") == \
+        "No, butter is not on the shopping list."
@@ -0,0 +1,17 @@
+"""Spoken answers from math_cmd.handle() for unit conversions."""
+
+from hecko.commands import math_cmd
+
+
+def _answer(text):
+    return math_cmd.handle(math_cmd.parse(text))
+
+
+def test_freezing_point_is_exactly_zero():
+    assert _answer("convert 32 fahrenheit to celsius") == (
+        "32 degrees Fahrenheit is 0 degree Celsius.")
+
+
+def test_boiling_point():
+    assert _answer("convert 212 fahrenheit to celsius") == (
+        "212 degrees Fahrenheit is 100 degrees Celsius.")
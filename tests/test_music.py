@@ -0,0 +1,84 @@
+"""Volume ducking in the music command, against a fake Spotify client."""
+
+import pytest
+
+from hecko.commands import music
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+class FakeSpotify:
+    """Just enough of spotipy.Spotify for duck_volume/restore_volume."""
+
+    def __init__(self, device_id="dev1", volume=50):
+        self.device_id = device_id
+        self.volumes = {device_id: volume}
+        self.playback_calls = 0
+
+    def current_playback(self):
+        self.playback_calls += 1
+        return {"device": {"id": self.device_id,
+                           "volume_percent": self.volumes[self.device_id]}}
+
+    def devices(self):
+        return {"devices": [{"id": self.device_id, "is_active": True,
+                             "volume_percent": self.volumes[self.device_id]}]}
+
+    def volume(self, level, device_id=None):
+        self.volumes[device_id] = level
+
+
+@pytest.fixture
+def sp(monkeypatch):
+    fake = FakeSpotify()
+    monkeypatch.setattr(music, "_sp", fake)
+    monkeypatch.setattr(music, "time", FakeClock())
+    monkeypatch.setattr(music, "_device_id", None)
+    monkeypatch.setattr(music, "_device_volume", None)
+    monkeypatch.setattr(music, "_saved_volume", None)
+    monkeypatch.setattr(music, "_saved_device_id", None)
+    return fake
+
+
+def test_duck_and_restore(sp):
+    music.duck_volume(10)
+    assert sp.volumes["dev1"] == 10
+    music.restore_volume()
+    assert sp.volumes["dev1"] == 50
+
+
+def test_restore_after_volume_changed_on_player(sp):
+    music.duck_volume(10)
+    music.restore_volume()
+    sp.volumes["dev1"] = 80  # turned up on the player
+    music.time.now += 30
+    music.duck_volume(10)
+    music.restore_volume()
+    assert sp.volumes["dev1"] == 80
+    assert sp.playback_calls == 2
+
+
+def test_back_to_back_ducks_use_cached_volume(sp):
+    music.duck_volume(10)
+    music.restore_volume()
+    music.duck_volume(10)
+    music.restore_volume()
+    assert sp.volumes["dev1"] == 50
+    assert sp.playback_calls == 1
+
+
+def test_restore_goes_to_the_ducked_device(sp):
+    music.duck_volume(10)
+    # Playback moves to another device, and the device list is re-read
+    sp.device_id = "dev2"
+    sp.volumes["dev2"] = 30
+    music.time.now += 120
+    music._get_device_id()
+    music.restore_volume()
+    assert sp.volumes == {"dev1": 50, "dev2": 30}
@@ -10,7 +10,8 @@ See test_cases.txt for the format specification.
 import pytest
 from pathlib import Path
 
-from hecko.commands import ALL_COMMANDS as _ALL_MODULES
+from hecko.__main__ import best_parse as cli_best_parse
+from hecko.commands import ALL_COMMANDS as _ALL_MODULES, candidates
 
 
 def best_parse(text):
@@ -217,3 +218,22 @@ def test_parse(case):
             f"\n  Full:     {_fmt_parse(p)}"
             f"\n  Add these to test_cases.txt or remove from the parse."
         )
+
+
+@pytest.mark.parametrize("case", _CASES, ids=[c["input"] for c in _CASES])
+def test_candidates_pick_same_winner(case):
+    """-parse's prefilter and early exit must not change the full scan's winner."""
+    text = case["input"]
+    full = best_parse(text)
+    fast = cli_best_parse(text, candidates(text))
+    assert _module_name(fast) == _module_name(full), (
+        f"\n  Input:     {text!r}"
+        f"\n  Full scan: {_fmt_parse(full)}"
+        f"\n  Fast path: {_fmt_parse(fast)}"
+    )
+    if full is not None:
+        assert fast.command == full.command, (
+            f"\n  Input:     {text!r}"
+            f"\n  Full scan: {_fmt_parse(full)}"
+            f"\n  Fast path: {_fmt_parse(fast)}"
+        )